@@ -0,0 +1,83 @@
+"""Rule-based text-to-SQL fallback that answers common questions without an LLM.
+
+Covers a handful of FAQ-style patterns against the shared Chinook database;
+anything it does not recognize gets the same "I don't know" answer as the
+full agent's off-topic path.  Useful when no API key is configured and as a
+zero-latency baseline.
+"""
+
+import re
+
+from database import get_database
+
+FALLBACK_RESPONSE = "I don't know the answer to that. I can only answer questions about the Chinook music store database."
+
+# Compiled once at import: each rule is a single case-insensitive regex scan
+# instead of a .lower() copy plus several substring passes per call, and
+# adding rules no longer grows a branch chain.
+RULES = [
+    (
+        re.compile(r"\bhow many\b.*\bartists?\b", re.IGNORECASE),
+        "SELECT COUNT(*) AS ArtistCount FROM Artist",
+    ),
+    (
+        re.compile(r"\bhow many\b.*\btracks?\b", re.IGNORECASE),
+        "SELECT COUNT(*) AS TrackCount FROM Track",
+    ),
+    (
+        re.compile(r"\bhow many\b.*\balbums?\b", re.IGNORECASE),
+        "SELECT COUNT(*) AS AlbumCount FROM Album",
+    ),
+    (
+        re.compile(r"\btop\b.*\bartists?\b.*\balbums?\b", re.IGNORECASE),
+        "SELECT Artist.Name, COUNT(Album.AlbumId) AS AlbumCount "
+        "FROM Artist JOIN Album ON Artist.ArtistId = Album.ArtistId "
+        "GROUP BY Artist.ArtistId ORDER BY AlbumCount DESC LIMIT 10",
+    ),
+    (
+        re.compile(r"\bcustomers?\b.*\bcountry\b", re.IGNORECASE),
+        "SELECT Country, COUNT(*) AS CustomerCount FROM Customer "
+        "GROUP BY Country ORDER BY CustomerCount DESC",
+    ),
+    (
+        re.compile(r"\bgenres?\b", re.IGNORECASE),
+        "SELECT Name FROM Genre ORDER BY Name",
+    ),
+]
+
+
+def simple_text_to_sql(question):
+    """Map a recognized question pattern to SQL, or return '' if unknown."""
+    for pattern, sql in RULES:
+        if pattern.search(question):
+            return sql
+    return ""
+
+
+def answer(question):
+    """Answer a question via the rule table, or admit not knowing."""
+    sql = simple_text_to_sql(question)
+    if not sql:
+        return FALLBACK_RESPONSE
+    rows = get_database().execute_query(sql)
+    if len(rows) == 1 and len(rows[0]) == 1:
+        ((column, value),) = rows[0].items()
+        return f"The answer to your question is: {value} ({column})."
+    lines = [f"Here is what I found for: {question}"]
+    for row in rows[:10]:
+        lines.append("- " + ", ".join(f"{k}: {v}" for k, v in row.items()))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    test_questions = [
+        "How many artists are in the database?",
+        "How many tracks are there?",
+        "Which are the top artists by number of albums?",
+        "How many customers per country?",
+        "What is the meaning of life?",
+    ]
+    for question in test_questions:
+        print(f"Q: {question}")
+        print(f"A: {answer(question)}")
+        print()
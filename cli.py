@@ -0,0 +1,42 @@
+"""Interactive command-line front end for the text-to-SQL agent.
+
+Heavy imports (LangGraph, the Anthropic client, the database layer) are
+deferred until after the API-key check, so `python cli.py` prints its
+banner — or its error — in milliseconds instead of paying a few hundred
+milliseconds of import work first.
+"""
+
+import os
+import sys
+
+BANNER = "Chinook text-to-SQL agent. Ask a question, or 'quit' to exit."
+
+
+def main():
+    if not os.environ.get("ANTHROPIC_API_KEY"):
+        print(
+            "ANTHROPIC_API_KEY is not set. Export it, or run agent_simple.py "
+            "for the no-LLM fallback.",
+            file=sys.stderr,
+        )
+        return 1
+
+    from agent import TextToSQLAgent
+
+    agent = TextToSQLAgent()
+    print(BANNER)
+    while True:
+        try:
+            question = input("> ").strip()
+        except (EOFError, KeyboardInterrupt):
+            print()
+            return 0
+        if not question:
+            continue
+        if question.lower() in ("quit", "exit"):
+            return 0
+        print(agent.query(question))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
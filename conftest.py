@@ -0,0 +1,99 @@
+"""Shared pytest fixtures for the text-to-SQL project.
+
+The real Chinook dump lives on GitHub, so tests feed the database layer a
+miniature schema-compatible script instead.  Everything downstream of the
+download -- build pragmas, FK indexes, binary snapshot, deserialize
+hydration, authorizer, caches -- runs exactly as in production, offline.
+
+The suite holds no cross-test mutable state, so it runs unchanged under
+pytest-xdist (``pytest -n auto``); each worker builds its own fixture DB.
+"""
+
+from unittest import mock
+
+import pytest
+
+import database
+
+# A few rows per table, but every table and column the FK indexes and the
+# rule-based fallback touch must exist.
+SEED_SQL = """
+CREATE TABLE Artist (ArtistId INTEGER PRIMARY KEY, Name TEXT);
+CREATE TABLE Album (AlbumId INTEGER PRIMARY KEY, Title TEXT,
+    ArtistId INTEGER REFERENCES Artist(ArtistId));
+CREATE TABLE Genre (GenreId INTEGER PRIMARY KEY, Name TEXT);
+CREATE TABLE Track (TrackId INTEGER PRIMARY KEY, Name TEXT,
+    AlbumId INTEGER REFERENCES Album(AlbumId),
+    GenreId INTEGER REFERENCES Genre(GenreId));
+CREATE TABLE Customer (CustomerId INTEGER PRIMARY KEY, FirstName TEXT,
+    LastName TEXT, Country TEXT, SupportRepId INTEGER);
+CREATE TABLE Invoice (InvoiceId INTEGER PRIMARY KEY,
+    CustomerId INTEGER REFERENCES Customer(CustomerId), Total NUMERIC);
+CREATE TABLE InvoiceLine (InvoiceLineId INTEGER PRIMARY KEY,
+    InvoiceId INTEGER REFERENCES Invoice(InvoiceId),
+    TrackId INTEGER REFERENCES Track(TrackId), UnitPrice NUMERIC);
+CREATE TABLE Playlist (PlaylistId INTEGER PRIMARY KEY, Name TEXT);
+CREATE TABLE PlaylistTrack (PlaylistId INTEGER REFERENCES Playlist(PlaylistId),
+    TrackId INTEGER REFERENCES Track(TrackId));
+
+INSERT INTO Artist VALUES (1, 'AC/DC'), (2, 'Accept'), (3, 'Aerosmith');
+INSERT INTO Album VALUES
+    (1, 'For Those About To Rock We Salute You', 1),
+    (2, 'Let There Be Rock', 1),
+    (3, 'Balls to the Wall', 2);
+INSERT INTO Genre VALUES (1, 'Rock'), (2, 'Jazz');
+INSERT INTO Track VALUES
+    (1, 'For Those About To Rock (We Salute You)', 1, 1),
+    (2, 'Balls to the Wall', 3, 1),
+    (3, 'Fast As a Shark', 3, 1);
+INSERT INTO Customer VALUES
+    (1, 'Luis', 'Goncalves', 'Brazil', NULL),
+    (2, 'Leonie', 'Koehler', 'Germany', NULL);
+INSERT INTO Invoice VALUES (1, 1, 1.98), (2, 2, 0.99);
+INSERT INTO InvoiceLine VALUES (1, 1, 1, 0.99), (2, 1, 2, 0.99), (3, 2, 3, 0.99);
+INSERT INTO Playlist VALUES (1, 'Music');
+INSERT INTO PlaylistTrack VALUES (1, 1), (1, 2);
+"""
+
+
+@pytest.fixture(scope="session")
+def db(tmp_path_factory):
+    """One ChinookDatabase per session, built offline through the real cache pipeline.
+
+    Session scope means the seed script is executed and snapshotted once;
+    every test after the first hydrates nothing and just reuses the
+    connection, mirroring how the singleton behaves in production.
+    """
+    cache_dir = tmp_path_factory.mktemp("chinook-cache")
+    saved = database.DB_CACHE_PATH, database.SCHEMA_CACHE_PATH
+    database.DB_CACHE_PATH = str(cache_dir / "chinook.sqlite")
+    database.SCHEMA_CACHE_PATH = str(cache_dir / "schema.txt")
+    try:
+        with mock.patch.object(
+            database.ChinookDatabase, "_fetch_sql_script", lambda self: SEED_SQL
+        ):
+            yield database.ChinookDatabase()
+    finally:
+        database.DB_CACHE_PATH, database.SCHEMA_CACHE_PATH = saved
+
+
+@pytest.fixture(scope="session")
+def agent_module(db):
+    """The agent module, imported against the fixture database.
+
+    Imported lazily so the module-level get_database()/schema setup binds
+    to the seed cache instead of fetching the real dump.
+    """
+    import agent
+
+    return agent
+
+
+@pytest.fixture(scope="session")
+def sql_agent(agent_module):
+    """One TextToSQLAgent shared by the whole session.
+
+    Graph compilation and schema setup are paid once; the exact cache
+    strategy keeps the fixture free of the optional embedding model.
+    """
+    return agent_module.TextToSQLAgent(cache_strategy="exact")
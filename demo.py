@@ -0,0 +1,34 @@
+"""Quick demo of the shared Chinook database layer.
+
+Prints per-table row counts and a couple of sample queries without
+touching the LLM path, so it doubles as a smoke check that the cached
+database loads and answers.
+"""
+
+from database import get_database
+
+STAT_TABLES = ("Artist", "Album", "Track", "Customer", "Invoice")
+
+
+def main():
+    db = get_database()
+
+    print("Chinook table sizes:")
+    for table in STAT_TABLES:
+        # COUNT(*) lets SQLite answer from the b-tree without
+        # materializing every row as a Python dict.
+        count = db.execute_query(f"SELECT COUNT(*) AS c FROM {table}")[0]["c"]
+        print(f"  {table}: {count} rows")
+
+    print("\nTop 5 artists by number of albums:")
+    rows = db.execute_query(
+        "SELECT Artist.Name, COUNT(Album.AlbumId) AS Albums "
+        "FROM Artist JOIN Album ON Artist.ArtistId = Album.ArtistId "
+        "GROUP BY Artist.ArtistId ORDER BY Albums DESC LIMIT 5"
+    )
+    for row in rows:
+        print(f"  {row['Name']}: {row['Albums']}")
+
+
+if __name__ == "__main__":
+    main()
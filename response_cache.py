@@ -0,0 +1,61 @@
+"""Response cache for the text-to-SQL agent.
+
+Answering a question costs two LLM round-trips, so repeated (or merely
+rephrased) questions are worth short-circuiting.  Two strategies:
+
+- ``"exact"``: dictionary lookup on the normalized question text.
+- ``"semantic"``: additionally embeds questions with a small local
+  sentence-transformers model and returns the stored answer when cosine
+  similarity beats a threshold, so "customers from Brazil" also hits for
+  "Brazilian customers".  Requires the optional ``sentence-transformers``
+  package; without it the cache silently degrades to exact matching.
+"""
+
+import re
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _normalize(question):
+    return _WHITESPACE_RE.sub(" ", question.strip().lower())
+
+
+class ResponseCache:
+    """Question -> answer cache with exact and semantic lookup."""
+
+    def __init__(self, strategy="semantic", threshold=0.92):
+        self.strategy = strategy
+        self.threshold = threshold
+        self._exact = {}
+        self._entries = []  # (embedding, answer) pairs for semantic lookup
+        self._embedder = None
+        if strategy == "semantic":
+            try:
+                from sentence_transformers import SentenceTransformer
+
+                self._embedder = SentenceTransformer("all-MiniLM-L6-v2")
+            except ImportError:
+                self.strategy = "exact"
+
+    def get(self, question):
+        """Return the cached answer for ``question``, or None."""
+        key = _normalize(question)
+        if key in self._exact:
+            return self._exact[key]
+        if self._embedder is not None and self._entries:
+            embedding = self._embedder.encode(key, normalize_embeddings=True)
+            best, best_score = None, 0.0
+            for other, answer in self._entries:
+                score = float(embedding @ other)
+                if score > best_score:
+                    best, best_score = answer, score
+            if best_score >= self.threshold:
+                return best
+        return None
+
+    def put(self, question, answer):
+        key = _normalize(question)
+        self._exact[key] = answer
+        if self._embedder is not None:
+            embedding = self._embedder.encode(key, normalize_embeddings=True)
+            self._entries.append((embedding, answer))
@@ -0,0 +1,86 @@
+"""Tests for the agent's non-LLM machinery: routing, templates, caching.
+
+Everything here runs offline; nodes that would call the model are either
+exercised on their local short-circuit paths or not at all.
+"""
+
+import asyncio
+
+
+def test_classify_vetoes_off_topic(agent_module):
+    state = {"question": "What is the meaning of life?"}
+    out = agent_module.classify_relevance_node(state)
+    assert out["relevant_hint"] is False
+    assert out["response"] == agent_module.FALLBACK_RESPONSE
+
+
+def test_classify_passes_schema_vocabulary(agent_module):
+    out = agent_module.classify_relevance_node(
+        {"question": "How many artists are there?"}
+    )
+    assert out == {"relevant_hint": True}
+
+
+def test_classify_passes_entity_names(agent_module):
+    # No schema vocabulary at all, but these name data values; the model,
+    # not the lexical veto, must decide.
+    for question in (
+        "Anything by Metallica?",
+        "Do you have Back in Black?",
+        'What about "the wall"?',
+    ):
+        out = agent_module.classify_relevance_node({"question": question})
+        assert out == {"relevant_hint": True}, question
+
+
+def test_link_tables_finds_mentions(agent_module):
+    linked = agent_module._link_tables("total per customer invoice")
+    assert "Customer" in linked
+    assert "Invoice" in linked
+
+
+def test_execute_node_runs_and_reports_errors(agent_module):
+    out = asyncio.run(
+        agent_module.execute_sql_node({"sql_query": "SELECT COUNT(*) AS c FROM Genre"})
+    )
+    assert out == {"query_results": [{"c": 2}], "error": ""}
+    out = asyncio.run(agent_module.execute_sql_node({"sql_query": "SELECT nope"}))
+    assert out["error"]
+    assert out["response"] == agent_module.FALLBACK_RESPONSE
+
+
+def test_template_response_shapes(agent_module):
+    assert "42" in agent_module._template_response("how many?", [{"Count": 42}])
+    assert agent_module._template_response("none?", []).startswith("I found no")
+    wide = [{"a": 1, "b": 2, "c": 3}] * 3
+    assert agent_module._template_response("wide?", wide) == ""
+
+
+def test_fast_mode_skips_response_llm(agent_module):
+    rows = [{"Name": f"A{i}", "X": i, "Y": i, "Z": i} for i in range(30)]
+    out = asyncio.run(
+        agent_module.generate_response_node(
+            {"question": "q", "query_results": rows, "fast_mode": True}
+        )
+    )
+    assert out["response"].endswith("more rows.")
+
+
+def test_format_results_truncates(agent_module):
+    rows = [{"n": i} for i in range(agent_module.MAX_PROMPT_ROWS + 5)]
+    rendered = agent_module._format_results(rows)
+    assert "(+5 more rows)" in rendered
+
+
+def test_cache_hit_short_circuits_graph(sql_agent):
+    sql_agent.cache.put("How many genres?", "There are 2 genres.")
+    answer = asyncio.run(sql_agent.aquery("how  many GENRES?"))
+    assert answer == "There are 2 genres."
+
+
+def test_routers(agent_module):
+    assert (
+        agent_module._route_after_classify({"relevant_hint": True}) == "generate_sql"
+    )
+    assert agent_module._route_after_sql({"error": ""}) == "execute_sql"
+    assert agent_module._route_after_execute({"error": "boom"}) == "__end__"
@@ -0,0 +1,87 @@
+"""Tests for the SQLite layer: read-only guarantees, caching, schema text."""
+
+import pytest
+
+import database
+
+
+def test_select_returns_dict_rows(db):
+    rows = db.execute_query("SELECT Name FROM Artist ORDER BY ArtistId")
+    assert rows[0] == {"Name": "AC/DC"}
+    assert len(rows) == 3
+
+
+def test_non_select_rejected(db):
+    with pytest.raises(ValueError):
+        db.execute_query("DELETE FROM Artist")
+
+
+def test_write_via_cte_rejected(db):
+    # Passes the SELECT-shaped regex; the authorizer must still refuse it.
+    ok, error = db.validate_query(
+        "WITH x AS (SELECT 1) INSERT INTO Artist VALUES (99, 'Mallory')"
+    )
+    assert not ok
+    assert error
+
+
+def test_validate_query_verdicts(db):
+    assert db.validate_query("SELECT COUNT(*) FROM Album") == (True, "")
+    ok, error = db.validate_query("SELECT nope FROM Artist")
+    assert not ok
+    assert "nope" in error
+
+
+def test_result_cache_hit_on_normalized_repeat(db):
+    before = len(db._result_cache)
+    db.execute_query("SELECT COUNT(*) AS c FROM Track")
+    db.execute_query("SELECT  COUNT(*)   AS c\nFROM Track")
+    assert len(db._result_cache) == before + 1
+
+
+def test_whitespace_in_literals_reaches_sqlite_verbatim(db):
+    # The cache key collapses whitespace, but the executed statement must
+    # not: 'AC/DC' vs a two-space literal are different predicates.
+    rows = db.execute_query("SELECT COUNT(*) AS c FROM Artist WHERE Name = 'AC/DC'")
+    assert rows == [{"c": 1}]
+    rows = db.execute_query("SELECT 'A  B' AS v")
+    assert rows == [{"v": "A  B"}]
+    rows = db.execute_query("SELECT 'A\nB' AS v")
+    assert rows == [{"v": "A\nB"}]
+
+
+def test_row_limit_clamped(db):
+    rows = db.execute_query("SELECT TrackId FROM Track", limit=2)
+    assert len(rows) == 2
+    rows = db.execute_query("SELECT TrackId FROM Track", limit=10**6)
+    assert len(rows) <= database.MAX_RESULT_ROWS
+
+
+def test_seed_table_counts(db):
+    # All sanity counts in one statement: a single round-trip through the
+    # SQLite VM instead of one execute/fetchone per table.
+    tables = ("Artist", "Album", "Track", "Customer", "Invoice")
+    row = db.execute_query(
+        "SELECT "
+        + ", ".join(f"(SELECT COUNT(*) FROM {t}) AS {t}" for t in tables)
+    )[0]
+    assert row == {"Artist": 3, "Album": 3, "Track": 3, "Customer": 2, "Invoice": 2}
+
+
+def test_schema_info_lists_tables_and_columns(db):
+    schema = db.get_schema_info()
+    assert "Table: Artist" in schema
+    assert "ArtistId (INTEGER)" in schema
+    # Memoized: identical object on repeat calls.
+    assert db.get_schema_info() is schema
+
+
+def test_normalize_sql_preserves_literals():
+    sql = "SELECT * FROM Customer  WHERE Country = 'Brazil'"
+    assert "'Brazil'" in database._normalize_sql(sql)
+    # Whitespace inside quotes survives, so these must not share a key.
+    assert database._normalize_sql("SELECT 'A  B'") != database._normalize_sql(
+        "SELECT 'A\nB'"
+    )
+    # Escaped quote inside a literal does not end the quoted region.
+    assert "'it''s  here'" in database._normalize_sql("SELECT  'it''s  here'")